@@ -6,20 +6,38 @@ Generates a Markdown report for the C++ singleton scope tutorial,
 suitable for presentation slides.
 """
 
+import argparse
+import hashlib
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from itertools import chain
 from pathlib import Path
-from typing import Optional, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Final, Iterator, Mapping, AbstractSet, FrozenSet, Collection
 
 # Project root directory
 PROJECT_ROOT = Path(__file__).parent.parent
 OUTPUT_FILE = PROJECT_ROOT / "singleton_scope_report.md"
+# Fingerprint of the inputs the current OUTPUT_FILE was generated from
+FINGERPRINT_FILE = PROJECT_ROOT / ".report.fingerprint"
+
+# Expected result section in plan.md (handles both English and Chinese headers)
+# followed by its fenced code block. Matched on decoded text with the stdlib
+# engine so \s and \w stay Unicode-aware (RE2's are ASCII-only).
+_EXPECTED_OUTPUT_RE = re.compile(
+    r'##\s*(?:Expected|預期)[^\n]*\n+```(?:\w+)?\n(.*?)```',
+    re.DOTALL | re.IGNORECASE,
+)
 
 
 # =============================================================================
 # SCOPE DEFINITIONS
 # =============================================================================
 
-SCOPE_DEFINITIONS: Dict[str, Any] = {
+SCOPE_DEFINITIONS: Mapping[str, Any] = {
     "tu_scope": {
         "level": 1,
         "title": "Translation Unit Scope",
@@ -311,34 +329,109 @@ Another instance is already running!"""
 }
 
 
+# Static text that is stripped once at import rather than on every render
+_PRESTRIPPED_KEYS = frozenset({"snippet", "expected_output_fallback"})
+
+# Values that stay str because they are file paths, not report text
+_PATH_KEYS = frozenset({"expected_output_source"})
+
+
+def _finalize_defs(value: Any, key: Optional[str] = None) -> Any:
+    """
+    Deep-freeze definitions at import time.
+    Dicts become read-only MappingProxyType views, lists become tuples, and
+    snippet/fallback text is pre-stripped so renderers never have to.
+    Report text is encoded to UTF-8 bytes once here, and each scope gets its
+    report section number (the overview is section 1).
+    """
+    if isinstance(value, dict):
+        frozen = {k: _finalize_defs(v, k) for k, v in value.items()}
+        if "level" in frozen:
+            frozen["section_number"] = frozen["level"] + 1
+        return MappingProxyType(frozen)
+    if isinstance(value, list):
+        return tuple(_finalize_defs(item) for item in value)
+    if isinstance(value, str) and key not in _PATH_KEYS:
+        if key in _PRESTRIPPED_KEYS:
+            value = value.strip()
+        return value.encode("utf-8")
+    return value
+
+
+SCOPE_DEFINITIONS = _finalize_defs(SCOPE_DEFINITIONS)
+
+
 # =============================================================================
 # UTILITY FUNCTIONS
 # =============================================================================
 
-def format_code_block(code: str, lang: str = "cpp") -> str:
-    """Wrap code in markdown fenced code block."""
-    return f"```{lang}\n{code.strip()}\n```"
+# Markdown code fences, written inline by the section generators
+_CPP_OPEN = b"```cpp\n"
+_OUTPUT_OPEN = b"```\n"
+_FENCE_CLOSE = b"\n```"
 
 
-def format_output_block(output: str) -> str:
-    """Wrap output in markdown fenced code block."""
-    return f"```\n{output.strip()}\n```"
+def expected_output_sources() -> Dict[str, Path]:
+    """Map each scope that has one to its configured plan.md path."""
+    return {
+        scope_key: PROJECT_ROOT / scope_data["expected_output_source"]
+        for scope_key, scope_data in SCOPE_DEFINITIONS.items()
+        if "expected_output_source" in scope_data
+    }
 
 
-def extract_expected_output(plan_path: Path) -> Optional[str]:
+def find_plan_files(plan_paths: Collection[Path]) -> FrozenSet[str]:
+    """
+    Return which of ``plan_paths`` exist.
+    Each containing directory is scanned once, which is cheaper than a
+    stat() per file.
+    """
+    wanted = {str(plan_path) for plan_path in plan_paths}
+    plan_files = set()
+    for directory in {plan_path.parent for plan_path in plan_paths}:
+        try:
+            with os.scandir(directory) as entries:
+                # Build paths the same way callers do so membership tests match
+                plan_files.update(
+                    path for path in (str(directory / entry.name) for entry in entries)
+                    if path in wanted
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return frozenset(plan_files)
+
+
+def extract_expected_output(
+    plan_path: Path,
+    existing_plans: Optional[AbstractSet[str]] = None,
+) -> Optional[str]:
     """
     Extract expected output from plan.md files.
     Looks for sections starting with '## Expected' or '## 預期'.
+    If ``existing_plans`` (see find_plan_files) is given, it must have been
+    built from a set of paths that includes ``plan_path``. Any path not in it
+    is then treated as missing without touching the filesystem.
     """
-    if not plan_path.exists():
+    if existing_plans is not None and str(plan_path) not in existing_plans:
         return None
 
-    content = plan_path.read_text(encoding="utf-8")
+    try:
+        mtime_ns = plan_path.stat().st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    return _extract_expected_output_cached(str(plan_path), mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _extract_expected_output_cached(plan_path: str, mtime_ns: int) -> Optional[str]:
+    """Parse a plan.md file; keyed on mtime so unchanged files are not re-read."""
+    return _parse_expected_output(Path(plan_path).read_bytes().decode("utf-8"))
 
-    # Match expected result section (handles both English and Chinese headers)
-    # Look for code block after the header
-    pattern = r'##\s*(?:Expected|預期)[^\n]*\n+```(?:\w+)?\n(.*?)```'
-    match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
+
+def _parse_expected_output(content: str) -> Optional[str]:
+    """Return the expected-output block of plan.md text, if there is one."""
+    match = _EXPECTED_OUTPUT_RE.search(content)
 
     if match:
         return match.group(1).strip()
@@ -346,13 +439,103 @@ def extract_expected_output(plan_path: Path) -> Optional[str]:
     return None
 
 
+def _read_plan(plan_path: Path) -> Optional[bytes]:
+    """Read a plan.md file, or return None if it disappeared since the scan."""
+    try:
+        return plan_path.read_bytes()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def read_plan_files(plan_paths: Collection[Path]) -> Dict[str, Optional[bytes]]:
+    """
+    Read each plan.md once, concurrently, keyed by its path string.
+    Plans that do not exist (see find_plan_files) map to None.
+    """
+    unique_paths = {str(plan_path): plan_path for plan_path in plan_paths}
+    existing_plans = find_plan_files(unique_paths.values())
+    contents: Dict[str, Optional[bytes]] = dict.fromkeys(unique_paths)
+
+    to_read = [plan_path for key, plan_path in unique_paths.items() if key in existing_plans]
+    if not to_read:
+        return contents
+
+    with ThreadPoolExecutor(max_workers=len(to_read)) as pool:
+        for plan_path, content in zip(to_read, pool.map(_read_plan, to_read)):
+            contents[str(plan_path)] = content
+
+    return contents
+
+
+def compute_fingerprint(plan_contents: Mapping[str, Optional[bytes]]) -> str:
+    """
+    Fingerprint everything the report is generated from: this script
+    (including SCOPE_DEFINITIONS) and the contents of every configured plan.md
+    as returned by read_plan_files.
+    """
+    digest = hashlib.blake2b(Path(__file__).read_bytes())
+    for plan_file in sorted(plan_contents):
+        content = plan_contents[plan_file]
+        digest.update(plan_file.encode("utf-8") + b"\0")
+        # Length-prefix the content so a missing plan never hashes like an empty one
+        if content is None:
+            digest.update(b"missing\0")
+        else:
+            digest.update(b"%d\0" % len(content))
+            digest.update(content)
+    return digest.hexdigest()
+
+
+def report_is_up_to_date(fingerprint: str) -> bool:
+    """Check whether OUTPUT_FILE was generated from inputs with this fingerprint."""
+    try:
+        stored = FINGERPRINT_FILE.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return False
+    return stored == fingerprint and OUTPUT_FILE.exists()
+
+
+def collect_expected_outputs(
+    plan_contents: Optional[Mapping[str, Optional[bytes]]] = None,
+) -> Dict[str, Optional[bytes]]:
+    """
+    Extract expected output from every scope's plan.md in one batch.
+    ``plan_contents`` is the result of read_plan_files; when omitted the plans
+    are read here. Results are encoded to UTF-8 bytes for the report writer.
+    """
+    sources = expected_output_sources()
+
+    if plan_contents is None:
+        plan_contents = read_plan_files(sources.values())
+
+    outputs = {}
+    for scope_key, plan_path in sources.items():
+        content = plan_contents.get(str(plan_path))
+        output = _parse_expected_output(content.decode("utf-8")) if content is not None else None
+        outputs[scope_key] = output.encode("utf-8") if output is not None else None
+    return outputs
+
+
 # =============================================================================
 # SECTION GENERATORS
 # =============================================================================
 
-def generate_overview() -> str:
-    """Generate the overview section."""
-    return """# C++ Singleton Scope Tutorial Report
+# Section layouts; only the key code / variant blocks are rendered dynamically
+_SCOPE_SECTION_TEMPLATE = (
+    b"## %d. Level %d: %s\n\n"
+    b"### Problem\n\n%s\n\n"
+    b"### Mechanism\n\n%s\n\n"
+    b"### Key Code"
+)
+_PROCESS_SECTION_TEMPLATE = (
+    b"## %d. Level %d: %s\n\n"
+    b"### Problem\n\n%s\n\n"
+    b"### Why Needed\n\n%s\n\n"
+    b"### Four Implementation Patterns\n"
+)
+
+# Overview section
+_OVERVIEW_MD: Final[bytes] = """# C++ Singleton Scope Tutorial Report
 
 ## 1. Overview
 
@@ -387,95 +570,92 @@ This tutorial covers five progressively complex scope levels:
 2. **dso_scope** — Dynamic Shared Object: Symbol visibility
 3. **thread_scope** — Thread-Local Storage: `thread_local`
 4. **process_scope** — Process-wide: 4 practical patterns
-5. **os_scope** — Machine-wide: Kernel locks"""
+5. **os_scope** — Machine-wide: Kernel locks""".encode("utf-8")
 
 
-def generate_scope_section(scope_key: str, scope_data: dict) -> str:
-    """Generate markdown section for a scope level."""
-    level = scope_data["level"]
-    title = scope_data["title"]
+def generate_scope_section(
+    scope_key: str,
+    scope_data: Mapping[str, Any],
+    out: BytesIO,
+    extracted_output: Optional[bytes] = None,
+) -> None:
+    """
+    Write markdown section for a scope level to ``out``.
+    ``extracted_output`` is the plan.md expected output, if any was found.
+    """
+    key_code = scope_data.get("key_code", ())
 
-    sections = [
-        f"## {level + 1}. Level {level}: {title}",
-        "",
-        f"### Problem",
-        "",
+    out.write(_SCOPE_SECTION_TEMPLATE % (
+        scope_data["section_number"],
+        scope_data["level"],
+        scope_data["title"],
         scope_data["problem"],
-        "",
-        f"### Mechanism",
-        "",
         scope_data["mechanism"],
-        "",
-        f"### Key Code",
-    ]
+    ))
 
     # Add code snippets
-    for code_item in scope_data.get("key_code", []):
-        sections.append(f"\n**{code_item['description']}**\n")
-        sections.append(format_code_block(code_item["snippet"]))
+    for code_item in key_code:
+        out.write(b"\n\n**%s**\n\n" % code_item["description"])
+        out.write(_CPP_OPEN + code_item["snippet"] + _FENCE_CLOSE)
 
     # Add expected output
-    sections.append("\n### Expected Output\n")
-
-    # Try to extract from plan.md, fall back to hardcoded
-    output = None
-    if "expected_output_source" in scope_data:
-        plan_path = PROJECT_ROOT / scope_data["expected_output_source"]
-        output = extract_expected_output(plan_path)
+    out.write(b"\n\n### Expected Output\n\n")
 
+    # Prefer output extracted from plan.md, fall back to hardcoded
+    output = extracted_output
     if not output:
-        output = scope_data.get("expected_output_fallback", "")
+        output = scope_data.get("expected_output_fallback", b"")
 
-    sections.append(format_output_block(output))
+    out.write(_OUTPUT_OPEN + output + _FENCE_CLOSE)
 
-    return "\n".join(sections)
 
+# Layout of a process_scope variant around its code snippets
+_VARIANT_HEADER_TEMPLATE = b"\n#### %s\n\n**Concept:** %s\n"
+_VARIANT_FOOTER_TEMPLATE = b"\n- **Pros:** %s\n- **Cons:** %s"
 
-def generate_process_scope_section() -> str:
-    """Generate the process_scope section with all 4 variants."""
+
+def _iter_variant_lines(var_data: Mapping[str, Any]) -> Iterator[bytes]:
+    """Yield the markdown lines for one process_scope variant."""
+    yield _VARIANT_HEADER_TEMPLATE % (var_data["title"], var_data["concept"])
+
+    # Add code snippets
+    for code_item in var_data.get("key_code", ()):
+        yield b"\n**%s**\n" % code_item["description"]
+        yield _CPP_OPEN + code_item["snippet"] + _FENCE_CLOSE
+
+    # Pros/Cons
+    yield _VARIANT_FOOTER_TEMPLATE % (
+        var_data.get("pros", b"N/A"),
+        var_data.get("cons", b"N/A"),
+    )
+
+
+def generate_process_scope_section(out: BytesIO) -> None:
+    """Write the process_scope section with all 4 variants to ``out``."""
     scope_data = SCOPE_DEFINITIONS["process_scope"]
-    level = scope_data["level"]
-    title = scope_data["title"]
-
-    sections = [
-        f"## {level + 1}. Level {level}: {title}",
-        "",
-        f"### Problem",
-        "",
+    variants = scope_data["variants"]
+
+    out.write(_PROCESS_SECTION_TEMPLATE % (
+        scope_data["section_number"],
+        scope_data["level"],
+        scope_data["title"],
         scope_data["problem"],
-        "",
-        f"### Why Needed",
-        "",
         scope_data["concept"],
-        "",
-        "### Four Implementation Patterns",
-    ]
+    ))
 
-    # Add each variant
-    for var_key, var_data in scope_data["variants"].items():
-        sections.append(f"\n#### {var_data['title']}\n")
-        sections.append(f"**Concept:** {var_data['concept']}\n")
-
-        # Add code snippets
-        for code_item in var_data.get("key_code", []):
-            sections.append(f"\n**{code_item['description']}**\n")
-            sections.append(format_code_block(code_item["snippet"]))
-
-        # Pros/Cons
-        sections.append(f"\n- **Pros:** {var_data.get('pros', 'N/A')}")
-        sections.append(f"- **Cons:** {var_data.get('cons', 'N/A')}")
+    # Add each variant, joined in a single pass
+    out.write(b"\n".join(chain.from_iterable(
+        _iter_variant_lines(var_data) for var_data in variants.values()
+    )))
 
     # Add expected output (same for all variants when working correctly)
-    sections.append("\n### Expected Output (All Variants)\n")
-    output = scope_data.get("expected_output_fallback", "")
-    sections.append(format_output_block(output))
-
-    return "\n".join(sections)
+    out.write(b"\n\n### Expected Output (All Variants)\n\n")
+    output = scope_data.get("expected_output_fallback", b"")
+    out.write(_OUTPUT_OPEN + output + _FENCE_CLOSE)
 
 
-def generate_comparison_table() -> str:
-    """Generate the comparison table."""
-    return """## 7. Comparison Table
+# Comparison table
+_COMPARISON_MD: Final[bytes] = """## 7. Comparison Table
 
 | Scope | Mechanism | Key C++ Feature | Guarantee |
 |-------|-----------|-----------------|-----------|
@@ -483,12 +663,11 @@ def generate_comparison_table() -> str:
 | dso_scope | Symbol visibility | `-fvisibility=hidden` | Per-DSO |
 | thread_scope | TLS | `thread_local` | Per-thread |
 | process_scope | Various (4 variants) | Linker/dlsym/shm | Per-process |
-| os_scope | Kernel lock | `flock()` | Per-machine |"""
+| os_scope | Kernel lock | `flock()` | Per-machine |""".encode("utf-8")
 
 
-def generate_takeaways() -> str:
-    """Generate common pitfalls and when-to-use recommendations."""
-    return """## 8. Key Takeaways
+# Common pitfalls and when-to-use recommendations
+_TAKEAWAYS_MD: Final[bytes] = """## 8. Key Takeaways
 
 ### 8.1 Common Pitfalls
 
@@ -527,7 +706,7 @@ Do you have multiple DSOs/shared libraries?
 
 Single binary with multiple TUs?
   └─ Yes → tu_scope (inline)
-```"""
+```""".encode("utf-8")
 
 
 # =============================================================================
@@ -536,30 +715,69 @@ Single binary with multiple TUs?
 
 def main():
     """Generate the singleton scope report."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--list-plan-sources",
+        action="store_true",
+        help="print the existing configured plan.md files as a CMake list and exit",
+    )
+    args = parser.parse_args()
+
+    if args.list_plan_sources:
+        print(";".join(sorted(find_plan_files(expected_output_sources().values()))))
+        return
+
     print(f"Generating report...")
     print(f"Project root: {PROJECT_ROOT}")
     print(f"Output file: {OUTPUT_FILE}")
 
-    # Generate all sections
-    sections = [
-        generate_overview(),
-        generate_scope_section("tu_scope", SCOPE_DEFINITIONS["tu_scope"]),
-        generate_scope_section("dso_scope", SCOPE_DEFINITIONS["dso_scope"]),
-        generate_scope_section("thread_scope", SCOPE_DEFINITIONS["thread_scope"]),
-        generate_process_scope_section(),
-        generate_scope_section("os_scope", SCOPE_DEFINITIONS["os_scope"]),
-        generate_comparison_table(),
-        generate_takeaways(),
-    ]
-
-    report = "\n\n".join(sections)
-
-    # Write output
-    OUTPUT_FILE.write_text(report, encoding="utf-8")
+    # Skip regeneration when neither this script nor any plan.md changed
+    plan_contents = read_plan_files(expected_output_sources().values())
+    fingerprint = compute_fingerprint(plan_contents)
+    if report_is_up_to_date(fingerprint):
+        # Refresh the timestamp so build tools see the report as current
+        OUTPUT_FILE.touch()
+        print(f"\nReport is up to date, nothing to do.")
+        return
+
+    # Reuse the plan contents read for the fingerprint
+    expected_outputs = collect_expected_outputs(plan_contents)
+
+    # Generate all sections into a single buffer
+    out = BytesIO()
+    out.write(_OVERVIEW_MD)
+    out.write(b"\n\n")
+    generate_scope_section(
+        "tu_scope", SCOPE_DEFINITIONS["tu_scope"], out, expected_outputs.get("tu_scope")
+    )
+    out.write(b"\n\n")
+    generate_scope_section(
+        "dso_scope", SCOPE_DEFINITIONS["dso_scope"], out, expected_outputs.get("dso_scope")
+    )
+    out.write(b"\n\n")
+    generate_scope_section(
+        "thread_scope", SCOPE_DEFINITIONS["thread_scope"], out, expected_outputs.get("thread_scope")
+    )
+    out.write(b"\n\n")
+    generate_process_scope_section(out)
+    out.write(b"\n\n")
+    generate_scope_section(
+        "os_scope", SCOPE_DEFINITIONS["os_scope"], out, expected_outputs.get("os_scope")
+    )
+    out.write(b"\n\n")
+    out.write(_COMPARISON_MD)
+    out.write(b"\n\n")
+    out.write(_TAKEAWAYS_MD)
+
+    report = out.getvalue()
+
+    # Write output in one shot; the report is already UTF-8 bytes
+    OUTPUT_FILE.write_bytes(report)
+    FINGERPRINT_FILE.write_text(fingerprint, encoding="utf-8")
 
     print(f"\nReport generated successfully!")
-    print(f"Size: {len(report):,} characters")
-    print(f"Lines: {report.count(chr(10)):,}")
+    print(f"Size: {len(report):,} bytes")
+    print(f"Lines: {report.count(10):,}")
 
 
 if __name__ == "__main__":
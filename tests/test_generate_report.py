@@ -0,0 +1,117 @@
+"""Regression tests for scripts/generate_report.py (run: python -m unittest discover -s tests)."""
+
+import importlib
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import generate_report  # noqa: E402
+
+
+CJK_FENCE_PLAN = "# 計畫\n\n## 預期輸出\n\n```輸出\nok\n```\n"
+IDEOGRAPHIC_SPACE_PLAN = "##　Expected\n```\nok\n```\n"
+
+
+class ExtractExpectedOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+
+    def write_plan(self, text: str) -> Path:
+        plan_path = self.root / "plan.md"
+        plan_path.write_text(text, encoding="utf-8")
+        return plan_path
+
+    def test_cjk_fence(self):
+        plan_path = self.write_plan(CJK_FENCE_PLAN)
+        self.assertEqual(generate_report.extract_expected_output(plan_path), "ok")
+
+    def test_ideographic_space_after_header_marker(self):
+        plan_path = self.write_plan(IDEOGRAPHIC_SPACE_PLAN)
+        self.assertEqual(generate_report.extract_expected_output(plan_path), "ok")
+
+    def test_missing_plan(self):
+        plan_path = self.root / "missing" / "plan.md"
+        self.assertIsNone(generate_report.extract_expected_output(plan_path))
+
+    def test_plan_under_a_file(self):
+        plan_path = self.write_plan(CJK_FENCE_PLAN) / "plan.md"
+        self.assertIsNone(generate_report.extract_expected_output(plan_path))
+
+    def test_cjk_fence_with_re2_installed(self):
+        # RE2's \s and \w are ASCII-only; the module must not pick it up
+        fake_re2 = types.ModuleType("re2")
+
+        def compile(*args, **kwargs):
+            raise AssertionError("RE2 must not be used for plan.md matching")
+
+        fake_re2.compile = compile
+        sys.modules["re2"] = fake_re2
+        try:
+            module = importlib.reload(generate_report)
+            plan_path = self.write_plan(CJK_FENCE_PLAN)
+            self.assertEqual(module.extract_expected_output(plan_path), "ok")
+        finally:
+            del sys.modules["re2"]
+            importlib.reload(generate_report)
+
+
+class FindPlanFilesTest(unittest.TestCase):
+    def test_only_existing_plans_are_listed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "nested" / "deeper").mkdir(parents=True)
+            present = [root / "plan.md", root / "nested" / "deeper" / "plan.md"]
+            for plan_path in present:
+                plan_path.write_text("# plan\n", encoding="utf-8")
+            absent = [root / "gone" / "plan.md", root / "plan.md" / "plan.md"]
+
+            found = generate_report.find_plan_files(present + absent)
+
+        self.assertEqual(found, frozenset(str(plan_path) for plan_path in present))
+
+
+class PlanContentsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+
+    def test_plan_removed_after_scan_reads_as_missing(self):
+        plan_path = self.root / "plan.md"
+        # The scan saw the file, but it is gone by the time it is read
+        with mock.patch.object(
+            generate_report, "find_plan_files", return_value=frozenset({str(plan_path)})
+        ):
+            contents = generate_report.read_plan_files([plan_path])
+
+        self.assertEqual(contents, {str(plan_path): None})
+        generate_report.compute_fingerprint(contents)
+
+    def test_fingerprint_tells_missing_from_empty(self):
+        key = str(self.root / "plan.md")
+        self.assertNotEqual(
+            generate_report.compute_fingerprint({key: None}),
+            generate_report.compute_fingerprint({key: b""}),
+        )
+
+    def test_collect_uses_given_contents(self):
+        sources = generate_report.expected_output_sources()
+        contents = {
+            str(plan_path): CJK_FENCE_PLAN.encode("utf-8") for plan_path in sources.values()
+        }
+        with mock.patch.object(generate_report, "read_plan_files") as read_plan_files:
+            outputs = generate_report.collect_expected_outputs(contents)
+
+        read_plan_files.assert_not_called()
+        self.assertEqual(outputs, dict.fromkeys(sources, b"ok"))
+
+
+if __name__ == "__main__":
+    unittest.main()